@@ -1,8 +1,8 @@
-import json
 import sys
 import email
 import collections
 import time
+from fetch import read_store
 
 
 def extract_address(email_string):
@@ -51,7 +51,7 @@ if __name__ == "__main__":
     else:
         DATA_PATH = sys.argv[1]
 
-    store = json.load(open(DATA_PATH))
+    store, _ = read_store(DATA_PATH)
 
     addresses = map(extract_address, store.values())
     domains = map(extract_domain, addresses)
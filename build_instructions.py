@@ -1,10 +1,10 @@
-import json
 import sys
 import os
 import email
 from email.header import decode_header
 import collections
 from analyse import extract_address, extract_date, extract_domain, address_uids_mapping
+from fetch import read_store
 
 
 def extract_subject(email_string):
@@ -79,7 +79,7 @@ if __name__ == "__main__":
         if response == 'y':
             existing_instructions = load_existing_instructions_file()
 
-    store = json.load(open(DATA_PATH))
+    store, _ = read_store(DATA_PATH)
 
     addresses = map(extract_address, store.values())
     domains = map(extract_domain, addresses)
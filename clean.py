@@ -1,4 +1,3 @@
-import json
 import sys
 import collections
 import imaplib
@@ -6,7 +5,7 @@ import time
 import logging
 import re
 from analyse import extract_address, extract_domain
-from fetch import create_directory, init_logger, exception, init_imap
+from fetch import create_directory, init_logger, exception, init_imap, read_store
 
 
 def run_command(attempt_no, create_new_instance, command, uid):
@@ -114,7 +113,7 @@ if __name__ == "__main__":
 
     count = {'d': 0, 'r': 0}
 
-    store = json.load(open(DATA_PATH))
+    store, _ = read_store(DATA_PATH)
 
     addresses = map(extract_address, store.values())
 
@@ -1,13 +1,45 @@
 import imaplib
+import collections
 import time
 import logging
 import json
+import math
 import sys
 import os
+import re
+import select
+import ssl
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from socket import gaierror
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 imaplib._MAXLINE = 10_000_000  # Higher limit for imaplib
 
+FETCH_UID_PATTERN = re.compile(rb'\bUID (\d+)')
+IDLE_CHANGE_PATTERN = re.compile(rb'\* \d+ (EXISTS|RECENT|FETCH)\b')  # FETCH reports flag changes
+
+FETCH_CHUNK_SIZE = 100  # UIDs per FETCH command, small enough to spread across connections
+FETCH_WINDOW = 16  # FETCH commands in flight per connection
+FETCH_CONNECTIONS = 4
+META_KEY = '_meta'
+IDLE_TIMEOUT = 29 * 60  # Servers may drop IDLE after 30 minutes (RFC 2177)
+POLL_INTERVAL = 5 * 60  # Seconds between searches on servers without IDLE
+BACKOFF_BASE = 0.5  # Seconds, doubled on every retry
+BACKOFF_CAP = 30
+BACKOFF_JITTER = 0.5
+TRANSIENT_LOGIN_CODES = ('UNAVAILABLE', 'INUSE', 'LIMIT')  # RFC 5530 codes worth retrying LOGIN on
+
+class LoginRejected(imaplib.IMAP4.error):
+    pass
+
 def setup_logger(log_path):
     logging.basicConfig(
         filename=log_path,
@@ -23,62 +55,333 @@ def handle_exception():
 def ensure_directory_exists(directory):
     os.makedirs(directory, exist_ok=True)
 
-def initialize_imap(imap_host, imap_port, username, password, mailbox, logger):
+def open_imap_session(imap_host, imap_port, username, password, mailbox, logger):
+    # Raises on failure, used for additional sessions and reconnects that callers may retry
+    logger.info('Attempting IMAP login')
+
+    # mail = imaplib.IMAP4_SSL(imap_host, imap_port) # SSL
+    #STARTTLS
+    mail = imaplib.IMAP4(imap_host, imap_port)
     try:
-        logger.info('Attempting IMAP login')
-        
-        # mail = imaplib.IMAP4_SSL(imap_host, imap_port) # SSL
-        #STARTTLS
-        mail = imaplib.IMAP4(imap_host, imap_port)
         mail.starttls()
 
-        mail.login(username, password)
+        try:
+            mail.login(username, password)
+        except imaplib.IMAP4.abort:
+            raise
+        except imaplib.IMAP4.error as error:
+            # Many servers reject bad credentials with a plain NO, so only explicit
+            # temporary response codes are left for the caller to retry
+            if not any(f'[{code}' in str(error).upper() for code in TRANSIENT_LOGIN_CODES):
+                raise LoginRejected(*error.args) from error
+            raise
         logger.info('Successfully logged in')
-        mail.select(f'"{mailbox}"')
+        # Servers may advertise more capabilities once authenticated
+        mail.capabilities = tuple(mail.capability()[1][-1].decode().upper().split())
+        select_mailbox(mail, mailbox)
         return mail
-    except imaplib.IMAP4.error:
+    except Exception:
+        mail.shutdown()
+        raise
+
+def initialize_imap(imap_host, imap_port, username, password, mailbox, logger):
+    try:
+        return open_imap_session(imap_host, imap_port, username, password, mailbox, logger)
+    except imaplib.IMAP4.abort:
+        raise  # Dropped connection rather than bad credentials, callers may retry
+    except LoginRejected:
         logger.error(f'Failed to log in. Please check user credentials.\n{handle_exception()}')
         sys.exit(1)
+    except imaplib.IMAP4.error:
+        logger.error(f'Failed to open an IMAP session.\n{handle_exception()}')
+        sys.exit(1)
     except gaierror:
         logger.error(f'Failed to log in. Please check host name.\n{handle_exception()}')
         sys.exit(1)
 
-def fetch_email_header(mail, uid, retry_count, timeout_limit, timeout_wait, logger):
+def select_mailbox(mail, mailbox):
+    # Enabling CONDSTORE (RFC 4551) makes the server report HIGHESTMODSEQ on SELECT
+    if 'CONDSTORE' in mail.capabilities:
+        status, response = mail.select(f'"{mailbox}" (CONDSTORE)')
+    else:
+        status, response = mail.select(f'"{mailbox}"')
+    if status != 'OK':
+        raise imaplib.IMAP4.error(f'Failed to select mailbox "{mailbox}": {response}')
+
+def mailbox_state(mail):
+    # UIDVALIDITY and HIGHESTMODSEQ from the last SELECT, HIGHESTMODSEQ is None without CONDSTORE
+    _, uidvalidity = mail.response('UIDVALIDITY')
+    _, highest_modseq = mail.response('HIGHESTMODSEQ')
+    uidvalidity = int(uidvalidity[-1]) if uidvalidity and uidvalidity[-1] else None
+    highest_modseq = int(highest_modseq[-1]) if highest_modseq and highest_modseq[-1] else None
+    return uidvalidity, highest_modseq
+
+def build_uid_sequences(uids, chunk_size):
+    uids = sorted(int(uid) for uid in uids)
+    sequences = []
+
+    for start in range(0, len(uids), chunk_size):
+        chunk = uids[start:start + chunk_size]
+        parts = []
+        run_start = run_end = chunk[0]
+        for uid in chunk[1:]:
+            if uid == run_end + 1:
+                run_end = uid
+                continue
+            parts.append(f'{run_start}:{run_end}' if run_start != run_end else str(run_start))
+            run_start = run_end = uid
+        parts.append(f'{run_start}:{run_end}' if run_start != run_end else str(run_start))
+        sequences.append(','.join(parts))
+
+    return sequences
+
+def count_sequence_uids(sequence):
+    count = 0
+    for part in sequence.split(','):
+        start, _, end = part.partition(':')
+        count += int(end or start) - int(start) + 1
+    return count
+
+def parse_fetch_response(response):
+    # Servers may send the UID before or after the header literal, so look in both places
+    headers = {}
+    for index, part in enumerate(response):
+        if not isinstance(part, tuple):
+            continue
+        match = FETCH_UID_PATTERN.search(part[0])
+        if not match and index + 1 < len(response) and isinstance(response[index + 1], bytes):
+            match = FETCH_UID_PATTERN.search(response[index + 1])
+        if match:
+            headers[match.group(1).decode()] = part[1]
+    return headers
+
+def log_fetched_headers(sequence, headers, logger):
+    logger.info(f'Successfully fetched {len(headers)} headers for UIDs {sequence}')
+    expected = count_sequence_uids(sequence)
+    if len(headers) < expected:
+        logger.warning(f'Only {len(headers)} of {expected} requested headers were found in the response for UIDs {sequence}')
+
+def backoff_delay(retry_count):
+    # Clamp the exponent, the cap is reached long before and the float would overflow
+    return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** min(retry_count, 10)) + random.uniform(0, BACKOFF_JITTER)
+
+def fetch_email_headers(mail, connect, sequence, retry_count, timeout_limit, logger):
+    # Returns the headers and the session to carry on with. A session whose connection
+    # died is replaced, or is None if reconnecting failed.
     while retry_count <= timeout_limit:
         if retry_count > 0:
-            logger.info(f'Retrying ({retry_count}/{timeout_limit})...')
-            time.sleep(timeout_wait)
+            delay = backoff_delay(retry_count)
+            logger.info(f'Retrying ({retry_count}/{timeout_limit}) in {delay:.1f} seconds...')
+            time.sleep(delay)
+
+        if mail is None:
+            try:
+                logger.info('Reconnecting...')
+                mail = connect()
+            except (imaplib.IMAP4.error, OSError) as error:
+                logger.error(f'Failed to reconnect while fetching UIDs {sequence}.\n{handle_exception()}')
+                if isinstance(error, LoginRejected):
+                    return {}, None
+                retry_count += 1
+                continue
 
         try:
-            status, response = mail.uid('FETCH', uid, '(BODY.PEEK[HEADER])')
+            status, response = mail.uid('FETCH', sequence, '(BODY.PEEK[HEADER])')
             if status == 'OK':
-                logger.info(f'Successfully fetched header for UID {uid}')
-                return response[0][1]
+                headers = parse_fetch_response(response)
+                log_fetched_headers(sequence, headers, logger)
+                return headers, mail
             else:
-                logger.warning(f'Problem fetching header for UID {uid}. Response: {response}')
-        except imaplib.IMAP4.abort:
-            logger.error(f'Connection closed by server while fetching UID {uid}.\n{handle_exception()}')
+                logger.warning(f'Problem fetching headers for UIDs {sequence}. Response: {response}')
+        except (imaplib.IMAP4.abort, OSError):
+            logger.error(f'Connection lost while fetching UIDs {sequence}.\n{handle_exception()}')
+            mail = None  # The socket is unusable, reconnect before the next attempt
+        except imaplib.IMAP4.error:
+            logger.error(f'Server rejected FETCH for UIDs {sequence}, not retrying.\n{handle_exception()}')
+            return {}, mail
         except Exception:
-            logger.error(f'Unexpected error while fetching UID {uid}.\n{handle_exception()}')
+            logger.error(f'Unexpected error while fetching UIDs {sequence}.\n{handle_exception()}')
 
         retry_count += 1
 
-    logger.error(f'Failed to fetch UID {uid} after {timeout_limit} retries.')
-    return None
+    logger.error(f'Failed to fetch UIDs {sequence} after {timeout_limit} retries.')
+    return {}, mail
+
+def fetch_email_headers_pipelined(mail, work, window, on_headers, logger):
+    # Keep up to `window` tagged FETCH commands in flight, taking the next sequence off the
+    # shared `work` queue as each one completes; responses carry their UID so they can be
+    # matched regardless of tag. Returns the sequences that failed.
+    failed = []
+    pending = collections.deque()
+
+    while True:
+        # Only network errors count as a lost connection, on_headers below writes to disk
+        try:
+            while len(pending) < window:
+                try:
+                    sequence = work.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    pending.append((mail._command('UID', 'FETCH', sequence, '(BODY.PEEK[HEADER])'), sequence))
+                except (imaplib.IMAP4.abort, OSError):
+                    failed.append(sequence)
+                    raise
+            if not pending:
+                break
+
+            tag, sequence = pending[0]
+            try:
+                status, response = mail._untagged_response(*mail._command_complete('FETCH', tag), 'FETCH')
+            except (imaplib.IMAP4.abort, OSError):
+                raise  # The connection is gone, fail every command still in flight
+            except Exception:
+                logger.error(f'Unexpected error while fetching UIDs {sequence}.\n{handle_exception()}')
+                failed.append(pending.popleft()[1])
+                continue
+        except (imaplib.IMAP4.abort, OSError):
+            logger.error(f'Connection lost with {len(pending)} FETCH commands in flight.\n{handle_exception()}')
+            failed.extend(sequence for _, sequence in pending)
+            break
+        pending.popleft()
+
+        chunk_headers = parse_fetch_response(response)
+        on_headers(chunk_headers)
+        if status == 'OK':
+            log_fetched_headers(sequence, chunk_headers, logger)
+        else:
+            logger.warning(f'Problem fetching headers for UIDs {sequence}. Response: {response}')
+            failed.append(sequence)
+
+    return failed
+
+def fetch_email_headers_concurrently(connect, mail, sequences, connections, window, timeout_limit, on_headers, logger):
+    # Every session keeps its own pipeline fed from a shared queue, so sessions that are
+    # still logging in pick up whatever the others have not started yet. The already open
+    # session is reused and the rest are opened by their worker while work remains.
+    # on_headers is called with every batch of fetched headers, one call at a time.
+    work = queue.Queue()
+    for sequence in sequences:
+        work.put(sequence)
+    headers_lock = threading.Lock()
+
+    def deliver(headers):
+        if headers:
+            with headers_lock:
+                on_headers(headers)
+
+    def worker(shared_session):
+        session = shared_session
+        if session is None:
+            if work.empty():
+                return
+            try:
+                session = connect()
+            except (imaplib.IMAP4.error, gaierror, OSError):
+                # e.g. the server limits simultaneous connections, carry on with fewer sessions
+                logger.error(f'Failed to open an additional IMAP session.\n{handle_exception()}')
+                return
+        try:
+            while True:
+                failed = fetch_email_headers_pipelined(session, work, window, deliver, logger)
+                for sequence in failed:
+                    headers, session = fetch_email_headers(session, connect, sequence, 1, timeout_limit, logger)
+                    deliver(headers)
+                if work.empty():
+                    return
+                if session is None:
+                    logger.error('No IMAP session available, stopping this fetch worker.')
+                    return
+        finally:
+            if session is not None and session is not shared_session:
+                try:
+                    session.logout()
+                except Exception:
+                    pass
+
+    sessions = [mail] + [None] * (min(connections, len(sequences)) - 1)
+    # Don't let the first session fill its window with work the others could share
+    window = max(1, min(window, math.ceil(len(sequences) / len(sessions))))
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        for future in [executor.submit(worker, session) for session in sessions]:
+            future.result()
+
+def json_dumps(obj):
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+def json_loads(data):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def parse_store(data_path):
+    # The store is newline-delimited JSON, one {uid: header} object per line, so new
+    # headers can be appended without rewriting the file. A single-line store written
+    # by older versions parses the same way. Lines keyed by META_KEY hold the search
+    # cursor rather than an email, the last one wins and they are returned separately.
+    store = {}
+    meta_lines = 0
+    if os.path.isfile(data_path):
+        with open(data_path, 'rb') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json_loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line left by an interrupted write
+                meta_lines += META_KEY in entry
+                store.update(entry)
+    meta = store.pop(META_KEY, {})
+    return store, meta, meta_lines
+
+def read_store(data_path):
+    store, meta, _ = parse_store(data_path)
+    return store, meta
+
+def compact_store(store, meta, data_path):
+    # Rewrite the store with a single cursor line, replacing the file only once fully written
+    temp_path = data_path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        for uid, header in store.items():
+            file.write(json_dumps({uid: header}) + b'\n')
+        if meta:
+            file.write(json_dumps({META_KEY: meta}) + b'\n')
+    os.replace(temp_path, data_path)
 
 def load_store(data_path, logger):
     if os.path.isfile(data_path):
-        with open(data_path, 'r') as file:
-            store = json.load(file)
+        store, meta, meta_lines = parse_store(data_path)
         logger.info(f'Loaded {len(store)} emails from existing store')
-        return store
+        if meta_lines > 1:
+            # Every cursor change appends a line, drop the superseded ones
+            compact_store(store, meta, data_path)
+            logger.info(f'Compacted {meta_lines} cursor lines in the store into one')
+        return store, meta
     else:
         logger.info('No existing store found. Starting fresh.')
-        return {}
+        return {}, {}
 
-def save_store(store, data_path):
-    with open(data_path, 'w') as file:
-        json.dump(store, file, sort_keys=True)
+def open_store_for_append(data_path):
+    file = open(data_path, 'ab+')
+    # Start on a fresh line if the store was written by an older version or a write was interrupted
+    if file.tell() > 0:
+        file.seek(file.tell() - 1)
+        if file.read(1) != b'\n':
+            file.write(b'\n')
+    return file
+
+def append_to_store(store, headers, file):
+    for uid, header in headers.items():
+        store[uid] = header.decode(errors='ignore')
+        file.write(json_dumps({uid: store[uid]}) + b'\n')
+    file.flush()
+
+def append_meta_to_store(meta, file):
+    file.write(json_dumps({META_KEY: meta}) + b'\n')
+    file.flush()
 
 def is_valid_port(value):
     try:
@@ -87,66 +390,179 @@ def is_valid_port(value):
     except ValueError:
         return False
 
+def has_buffered_data(mail):
+    # select() cannot see bytes already read into imaplib's file buffer or the TLS layer,
+    # so peek without blocking before waiting on the socket.
+    mail.sock.setblocking(False)
+    try:
+        return bool(mail.file.peek(1))
+    except (BlockingIOError, ssl.SSLWantReadError):
+        return False
+    finally:
+        mail.sock.setblocking(True)
+
+def wait_for_new_mail(mail, idle_timeout, logger):
+    # IMAP IDLE (RFC 2177), which imaplib does not implement. Returns True once the
+    # server reports a mailbox change, False if idle_timeout passes without one.
+    if 'IDLE' not in mail.capabilities:
+        time.sleep(POLL_INTERVAL)
+        return True
+
+    tag = mail._new_tag()
+    mail.tagged_commands.pop(tag, None)
+    mail.send(tag + b' IDLE\r\n')
+
+    # Untagged data may arrive before the continuation, and counts as a change
+    changed = False
+    while True:
+        line = mail.readline()
+        if not line:
+            raise imaplib.IMAP4.abort('Connection closed by server while starting IDLE')
+        if line.startswith(b'+'):
+            break
+        if line.startswith(tag + b' '):
+            logger.warning(f'IDLE rejected by server, polling instead: {line.strip()}')
+            mail.capabilities = tuple(capability for capability in mail.capabilities if capability != 'IDLE')
+            time.sleep(POLL_INTERVAL)
+            return True
+        logger.debug(f'IDLE: {line.strip()}')
+        changed = changed or IDLE_CHANGE_PATTERN.match(line) is not None
+
+    deadline = time.monotonic() + idle_timeout
+    while not changed:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if not has_buffered_data(mail) and not select.select([mail.sock], [], [], remaining)[0]:
+            break
+        line = mail.readline()
+        if not line:
+            raise imaplib.IMAP4.abort('Connection closed by server during IDLE')
+        logger.debug(f'IDLE: {line.strip()}')
+        changed = IDLE_CHANGE_PATTERN.match(line) is not None
+
+    mail.send(b'DONE\r\n')
+    while True:
+        line = mail.readline()
+        if not line:
+            raise imaplib.IMAP4.abort('Connection closed by server while ending IDLE')
+        if line.startswith(tag + b' '):
+            break
+
+    return changed
+
 def parse_arguments():
-    if len(sys.argv) < 4:
-        print('Usage: python fetch.py <imap_host> <username> <password> [mailbox] [imap_port]')
+    daemon = '--daemon' in sys.argv
+    argv = [arg for arg in sys.argv if arg != '--daemon']
+
+    if len(argv) < 4:
+        print('Usage: python fetch.py <imap_host> <username> <password> [mailbox] [imap_port] [--daemon]')
         sys.exit(1)
 
-    imap_host = sys.argv[1]
-    username = sys.argv[2]
-    password = sys.argv[3]
+    imap_host = argv[1]
+    username = argv[2]
+    password = argv[3]
     mailbox = 'Inbox'
     imap_port = 993
 
-    if len(sys.argv) > 4:
-        if is_valid_port(sys.argv[4]):
-            imap_port = int(sys.argv[4])
+    if len(argv) > 4:
+        if is_valid_port(argv[4]):
+            imap_port = int(argv[4])
         else:
-            mailbox = sys.argv[4]
+            mailbox = argv[4]
 
-    if len(sys.argv) > 5:
-        if is_valid_port(sys.argv[5]):
-            imap_port = int(sys.argv[5])
+    if len(argv) > 5:
+        if is_valid_port(argv[5]):
+            imap_port = int(argv[5])
         else:
             print('Error: Invalid port number provided.')
             sys.exit(1)
 
-    return imap_host, username, password, mailbox, imap_port
+    return imap_host, username, password, mailbox, imap_port, daemon
+
+def fetch_new_emails(mail, connect, mailbox, store, meta, store_file, timeout_limit, logger):
+    uidvalidity, highest_modseq = mailbox_state(mail)
+    logger.info(f'UIDVALIDITY: {uidvalidity}')
+    if meta.get('uidvalidity') not in (None, uidvalidity):
+        logger.warning(f'UIDVALIDITY changed from {meta["uidvalidity"]}, stored UIDs no longer match the mailbox')
+
+    logger.info(f'Fetching unread emails from mailbox: {mailbox}...')
+    if highest_modseq and meta.get('modseq') and meta.get('uidvalidity') == uidvalidity:
+        # Only messages changed since the last complete run can have become new matches
+        _, data = mail.uid('SEARCH', None, 'MODSEQ', str(meta['modseq'] + 1), '(SEEN)')
+        search_scope = f'changed since MODSEQ {meta["modseq"]}'
+    else:
+        _, data = mail.uid('SEARCH', None, '(SEEN)')
+        search_scope = 'in mailbox'
+    unread_uids = {uid.decode() for uid in data[0].split()}
+    new_uids = unread_uids - store.keys()
+
+    logger.info(f'{len(unread_uids)} unread emails found {search_scope}, {len(new_uids)} new to fetch.')
+
+    start_time = time.time()
+
+    sequences = build_uid_sequences(new_uids, FETCH_CHUNK_SIZE)
+    fetch_email_headers_concurrently(connect, mail, sequences, FETCH_CONNECTIONS, FETCH_WINDOW,
+                                     timeout_limit, partial(append_to_store, store, file=store_file), logger)
+
+    # Advance the cursor only once everything it covers is stored, so failed UIDs are searched
+    # again. Only write it when it moved; the lines a daemon still accumulates for each mailbox
+    # change are compacted by load_store on the next start
+    cursor = {'uidvalidity': uidvalidity, 'modseq': highest_modseq}
+    if highest_modseq and new_uids <= store.keys() and any(meta.get(key) != value for key, value in cursor.items()):
+        meta.update(uidvalidity=uidvalidity, modseq=highest_modseq)
+        append_meta_to_store(meta, store_file)
+
+    elapsed_time = time.time() - start_time
+    logger.info(f'Completed fetching. Fetched {len(new_uids)} emails in {elapsed_time:.1f} seconds.')
 
 def main():
-    imap_host, username, password, mailbox, imap_port = parse_arguments()
+    imap_host, username, password, mailbox, imap_port, daemon = parse_arguments()
 
     data_path = os.path.join(username, 'data_unseen.json')
     log_path = os.path.join(username, 'fetch_unseen.log')
-    timeout_wait = 30
     timeout_limit = 3
 
     ensure_directory_exists(username)
     logger = setup_logger(log_path)
 
-    store = load_store(data_path, logger)
-    previous_store_count = len(store)
+    store, meta = load_store(data_path, logger)
 
     mail = initialize_imap(imap_host, imap_port, username, password, mailbox, logger)
+    connect = partial(open_imap_session, imap_host, imap_port, username, password, mailbox, logger)
 
-    logger.info(f'Fetching unread emails from mailbox: {mailbox}...')
-    _, data = mail.uid('SEARCH', None, '(SEEN)')
-    unread_uids = set(data[0].split())
-    new_uids = unread_uids - store.keys()
-
-    logger.info(f'{len(unread_uids)} unread emails found, {len(new_uids)} new to fetch.')
-
-    start_time = time.time()
+    with open_store_for_append(data_path) as store_file:
+        if not daemon:
+            fetch_new_emails(mail, connect, mailbox, store, meta, store_file, timeout_limit, logger)
+            return
 
-    for uid in new_uids:
-        header = fetch_email_header(mail, uid, 0, timeout_limit, timeout_wait, logger)
-        if header:
-            store[uid.decode()] = header.decode(errors='ignore')
-
-    save_store(store, data_path)
-
-    elapsed_time = time.time() - start_time
-    logger.info(f'Completed fetching. Fetched {len(new_uids)} emails in {elapsed_time:.1f} seconds.')
+        logger.info('Running as daemon, waiting for new emails...')
+        # The first sync runs inside the loop so a dropped connection is retried like any other
+        fetch_due = True
+        retry_count = 0
+        while True:
+            try:
+                if mail is None:
+                    retry_count += 1
+                    time.sleep(backoff_delay(retry_count))
+                    logger.info('Reconnecting...')
+                    mail = connect()
+                elif not fetch_due:
+                    if not wait_for_new_mail(mail, IDLE_TIMEOUT, logger):
+                        continue
+                    select_mailbox(mail, mailbox)  # Refreshes HIGHESTMODSEQ
+                fetch_new_emails(mail, connect, mailbox, store, meta, store_file, timeout_limit, logger)
+                fetch_due = False
+                retry_count = 0
+            except (imaplib.IMAP4.abort, OSError):
+                logger.error(f'Connection lost while waiting for new emails.\n{handle_exception()}')
+                mail = None
+            except imaplib.IMAP4.error as error:
+                if isinstance(error, LoginRejected):
+                    logger.error(f'Failed to log in. Please check user credentials.\n{handle_exception()}')
+                    sys.exit(1)
+                logger.error(f'IMAP error while waiting for new emails.\n{handle_exception()}')
+                mail = None
 
 if __name__ == '__main__':
     main()